@@ -1,17 +1,42 @@
-import os
-import pandas as pd
-from datetime import date
-
-def save_raw(weather_data: dict):
-    today = date.today().isoformat()
+def save_raw(con, weather_data: dict, ingestion_date: str):
+    cities = []
+    payloads = []
 
     for city, data in weather_data.items():
         if data is None:
             continue
 
-        path = f"data/city={city}/date={today}"
-        os.makedirs(path, exist_ok=True)
+        cities.append(city)
+        payloads.append(data["current"])
 
-        df = pd.json_normalize(data["current"])
+    if not cities:
+        return
 
-        df.to_parquet(f"{path}/weather.parquet", index=False)
\ No newline at end of file
+    # The parsed payloads bind as a STRUCT list, so DuckDB types and writes
+    # them without re-parsing any JSON text. Bronze files hold a few rows
+    # each, so compression would cost more than it saves.
+    con.execute("""
+        COPY (
+            SELECT
+                CAST(current.time AS TIMESTAMP) AS time,
+                CAST(current.temperature_2m AS DOUBLE) AS temperature_2m,
+                CAST(current.wind_speed_10m AS DOUBLE) AS wind_speed_10m,
+                CAST(current.wind_direction_10m AS INTEGER) AS wind_direction_10m,
+                CAST(current.weather_code AS INTEGER) AS weather_code,
+                city,
+                $3 AS date
+            FROM (
+                SELECT
+                    UNNEST($1::TEXT[]) AS city,
+                    UNNEST($2) AS current
+            )
+        )
+        TO 'data'
+        (
+            FORMAT PARQUET,
+            COMPRESSION 'UNCOMPRESSED',
+            PARTITION_BY (city, date),
+            OVERWRITE_OR_IGNORE,
+            FILENAME_PATTERN 'weather-{i}'
+        );
+    """, [cities, payloads, ingestion_date])
@@ -1,9 +1,12 @@
 import duckdb
 import logging
 
+from metadata import mark_processed
+from partitions import list_hive_partitions, partition_paths, register_partitions
+
 logger = logging.getLogger(__name__)
 
-SILVER_SOURCE_PATH = "silver/**/*.parquet"
+SILVER_ROOT = "silver"
 
 
 # ---------------------------------------------------------------------
@@ -12,20 +15,10 @@ SILVER_SOURCE_PATH = "silver/**/*.parquet"
 
 def get_silver_partitions(con: duckdb.DuckDBPyConnection) -> set:
     """
-    Detect available Silver partitions using hive partitioning.
+    Detect available Silver partitions from the hive directory layout.
     Handles missing silver folder safely.
     """
-    try:
-        partitions = con.execute(f"""
-            SELECT DISTINCT city, date
-            FROM read_parquet('{SILVER_SOURCE_PATH}', hive_partitioning=true)
-        """).fetchall()
-
-        return set(partitions)
-
-    except duckdb.IOException:
-        logger.warning("No Silver data found.")
-        return set()
+    return list_hive_partitions(SILVER_ROOT)
 
 
 def get_processed_partitions(con: duckdb.DuckDBPyConnection) -> set:
@@ -42,32 +35,34 @@ def get_processed_partitions(con: duckdb.DuckDBPyConnection) -> set:
 # Validation
 # ---------------------------------------------------------------------
 
-def validate_partition(con: duckdb.DuckDBPyConnection):
-    row_count = con.execute(
-        "SELECT COUNT(*) FROM tmp_gold"
-    ).fetchone()[0]
-
-    if row_count == 0:
-        raise ValueError("Empty Gold partition detected.")
-
-    null_check = con.execute("""
-        SELECT COUNT(*) FROM tmp_gold
-        WHERE avg_temp IS NULL
-    """).fetchone()[0]
+def validate_partition(con: duckdb.DuckDBPyConnection, expected: str):
+    """
+    Check tmp_gold against the partition table it was built for.
+    Every expected partition must be present with a non-NULL average.
+    """
+    invalid = con.execute(f"""
+        SELECT e.city, e.date
+        FROM {expected} e
+        LEFT JOIN tmp_gold g USING (city, date)
+        WHERE g.avg_temp IS NULL
+    """).fetchall()
 
-    if null_check > 0:
-        raise ValueError("Gold aggregation produced NULL averages.")
+    if invalid:
+        raise ValueError(f"Empty or NULL-average Gold partitions detected: {invalid}")
 
 
 # ---------------------------------------------------------------------
 # Processing Logic
 # ---------------------------------------------------------------------
 
-def process_partition(con: duckdb.DuckDBPyConnection, city: str, date):
-    logger.info(f"Processing Gold partition: {city} - {date}")
-
+def aggregate_partitions(
+    con: duckdb.DuckDBPyConnection,
+    source: str,
+    expected: str,
+    params=None,
+):
     con.execute(f"""
-        CREATE OR REPLACE TABLE tmp_gold AS
+        CREATE OR REPLACE TEMP TABLE tmp_gold AS
         SELECT
             city,
             CAST(date AS DATE) AS date,
@@ -75,26 +70,40 @@ def process_partition(con: duckdb.DuckDBPyConnection, city: str, date):
             MAX(temperature) AS max_temp,
             MIN(temperature) AS min_temp,
             COUNT(*) AS record_count
-        FROM read_parquet('{SILVER_SOURCE_PATH}', hive_partitioning=true)
-        WHERE city = '{city}'
-          AND date = '{date}'
+        FROM {source}
         GROUP BY city, date
-    """)
+    """, params)
 
-    validate_partition(con)
+    validate_partition(con, expected)
 
-    con.execute(f"""
+
+def write_partitions(con: duckdb.DuckDBPyConnection):
+    con.execute("""
         COPY tmp_gold
         TO 'gold'
-        (FORMAT PARQUET, PARTITION_BY (city, date), OVERWRITE TRUE);
+        (FORMAT PARQUET, COMPRESSION 'zstd', PARTITION_BY (city, date), OVERWRITE_OR_IGNORE);
     """)
 
-    con.execute("""
-        INSERT OR REPLACE INTO pipeline_metadata
-        VALUES ('gold', ?, ?, CURRENT_TIMESTAMP)
-    """, [city, date])
 
-    logger.info(f"Finished Gold partition: {city} - {date}")
+def process_partitions(con: duckdb.DuckDBPyConnection, partitions: set):
+    logger.info(f"Processing {len(partitions)} Gold partitions")
+
+    register_partitions(con, "gold_to_process", partitions)
+
+    aggregate_partitions(
+        con,
+        """
+        read_parquet($1, hive_partitioning=true)
+        SEMI JOIN gold_to_process USING (city, date)
+        """,
+        "gold_to_process",
+        [partition_paths(SILVER_ROOT, partitions)],
+    )
+    write_partitions(con)
+
+    mark_processed(con, {"gold": "tmp_gold"})
+
+    logger.info(f"Finished {len(partitions)} Gold partitions")
 
 
 # ---------------------------------------------------------------------
@@ -119,7 +128,7 @@ def run(con: duckdb.DuckDBPyConnection, full_refresh: bool = False):
 
     logger.info(f"{len(to_process)} Gold partitions to process")
 
-    for city, date in to_process:
-        process_partition(con, city, date)
+    if to_process:
+        process_partitions(con, to_process)
 
     logger.info("Gold layer completed")
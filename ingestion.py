@@ -1,12 +1,26 @@
 import httpx
+import orjson
 import asyncio
 import logging
 
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+
 logger = logging.getLogger(__name__)
 
 BASE_URL = "https://api.open-meteo.com/v1/forecast"
 
 
+@retry(
+    retry=retry_if_exception_type((httpx.ConnectTimeout, httpx.ReadTimeout)),
+    stop=stop_after_attempt(3),
+    wait=wait_exponential_jitter(initial=1, jitter=1),  # jittered exponential backoff
+    reraise=True,
+)
 async def fetch_weather(client: httpx.AsyncClient, city:str, lat: float, lon: float):
     params = {
         "latitude": lat,
@@ -19,28 +33,27 @@ async def fetch_weather(client: httpx.AsyncClient, city:str, lat: float, lon: fl
         ]
     }
 
-    retries = 3
-
-    for attempt in range(retries):
-        try:
-            response = await client.get(BASE_URL, params=params)
-            response.raise_for_status()
-            return city, response.json()
-        
-        except (httpx.ConnectTimeout, httpx.ReadTimeout) as e:
-            if attempt == retries - 1:
-                raise
-            await asyncio.sleep(2 ** attempt)  # exponential backoff
+    response = await client.get(BASE_URL, params=params)
+    response.raise_for_status()
+    return city, orjson.loads(response.content)
 
 
 async def fetch_multiple(cities: dict):
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        tasks = [
-            fetch_weather(client, city, lat, lon)
-            for city, (lat, lon) in cities.items()
-        ]
-        results = await asyncio.gather(*tasks)
-
-        # Convert list of tuples → dict
-        return dict(results)
-
+    # One HTTP/2 connection is multiplexed across all city requests
+    async with httpx.AsyncClient(
+        http2=True,
+        timeout=10.0,
+        limits=httpx.Limits(max_keepalive_connections=16),
+    ) as client:
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tasks = [
+                    tg.create_task(fetch_weather(client, city, lat, lon))
+                    for city, (lat, lon) in cities.items()
+                ]
+        except ExceptionGroup as group:
+            # Surface the first failure itself, as asyncio.gather did
+            raise group.exceptions[0] from None
+
+    # Convert list of tuples → dict
+    return dict(task.result() for task in tasks)
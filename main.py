@@ -1,14 +1,17 @@
+import os
 import duckdb
 import logging
 import asyncio
+from datetime import datetime, timezone
 
-from metadata import initialize_metadata
+from metadata import initialize_metadata, mark_processed
 import ingestion
 import bronze
 import silver
 import gold
 
 logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 CITIES = {
@@ -18,22 +21,72 @@ CITIES = {
     "Tokyo": (35.6762, 139.6503),
 }
 
+# Optional DuckDB overrides; unset settings keep DuckDB's defaults
+# (threads = available cores, memory_limit = 80% of RAM)
+DUCKDB_SETTINGS_ENV = {
+    "threads": "DUCKDB_THREADS",
+    "memory_limit": "DUCKDB_MEMORY_LIMIT",
+    "temp_directory": "DUCKDB_TEMP_DIR",
+}
+
 
-async def run_ingestion():
+async def run_ingestion(con, ingestion_date: str):
     weather_data = await ingestion.fetch_multiple(CITIES)
-    bronze.save_raw(weather_data)
+    bronze.save_raw(con, weather_data, ingestion_date)
+
+
+def run_silver_and_gold(con, materialize_silver: bool = False):
+    # Gold aggregates the in-memory tmp_silver instead of re-reading silver
+    # parquet, so bronze is scanned once for both layers. Silver is only
+    # written to disk when materialize_silver is set.
+    if materialize_silver:
+        processed = silver.get_processed_partitions(con)
+    else:
+        processed = gold.get_processed_partitions(con)
+
+    to_process = silver.get_bronze_partitions(con) - processed
+
+    logger.info(f"{len(to_process)} Silver/Gold partitions to process")
+
+    if to_process:
+        silver.transform_partitions(con, to_process)
+
+        if materialize_silver:
+            silver.write_partitions(con)
+
+        gold.aggregate_partitions(con, "tmp_silver", "silver_to_process")
+        gold.write_partitions(con)
+
+        # Record the written layers in one metadata write once the COPYs succeeded
+        sources = {"gold": "tmp_gold"}
+        if materialize_silver:
+            sources["silver"] = "silver_to_process"
+
+        mark_processed(con, sources)
+
+    if materialize_silver:
+        # Pick up silver partitions that are still missing gold output
+        gold.run(con)
 
 
 def main():
-    con = duckdb.connect("pipeline.duckdb")
+    config = {
+        setting: os.environ[env]
+        for setting, env in DUCKDB_SETTINGS_ENV.items()
+        if os.environ.get(env)
+    }
+    config["preserve_insertion_order"] = False
+
+    con = duckdb.connect("pipeline.duckdb", config=config)
 
     initialize_metadata(con)
 
-    asyncio.run(run_ingestion())
+    # One UTC partition date for the whole run
+    ingestion_date = datetime.now(tz=timezone.utc).date().isoformat()
 
-    silver.run(con)
+    asyncio.run(run_ingestion(con, ingestion_date))
 
-    gold.run(con, full_refresh=True)
+    run_silver_and_gold(con)
 
 
 if __name__ == "__main__":
@@ -7,4 +7,16 @@ def initialize_metadata(con):
             processed_at TIMESTAMP,
             PRIMARY KEY (layer, city, date)
         );
-    """)
\ No newline at end of file
+    """)
+
+
+def mark_processed(con, sources):
+    union = "\n        UNION ALL\n        ".join(
+        f"SELECT ?, city, date, CURRENT_TIMESTAMP FROM {table}"
+        for table in sources.values()
+    )
+
+    con.execute(f"""
+        INSERT OR REPLACE INTO pipeline_metadata
+        {union}
+    """, list(sources))
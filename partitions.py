@@ -0,0 +1,36 @@
+from datetime import date
+from pathlib import Path
+from urllib.parse import quote, unquote
+
+
+def register_partitions(con, name, partitions):
+    cities = [city for city, _ in partitions]
+    dates = [str(date) for _, date in partitions]
+
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE {name} AS
+        SELECT
+            UNNEST($1::TEXT[]) AS city,
+            CAST(UNNEST($2::TEXT[]) AS DATE) AS date
+    """, [cities, dates])
+
+
+def partition_paths(root, partitions):
+    # Hive writers percent-encode partition values, which also leaves no
+    # glob metacharacters in the path
+    return [
+        f"{root}/city={quote(city, safe='')}/date={date}/*.parquet"
+        for city, date in partitions
+    ]
+
+
+def list_hive_partitions(root):
+    # Decode the directory names so values match what read_parquet reports
+    return {
+        (
+            unquote(p.parent.name.split("=", 1)[1]),
+            date.fromisoformat(unquote(p.name.split("=", 1)[1])),
+        )
+        for p in Path(root).glob("city=*/date=*")
+        if any(p.glob("*.parquet"))
+    }
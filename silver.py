@@ -1,15 +1,15 @@
 import logging
 
+from metadata import mark_processed
+from partitions import list_hive_partitions, partition_paths, register_partitions
+
 logger = logging.getLogger(__name__)
 
-bronze_path = "data/**/*.parquet"
+bronze_root = "data"
 
 
 def get_bronze_partitions(con):
-    return set(con.execute(f"""
-        SELECT DISTINCT city, date
-        FROM read_parquet('{bronze_path}', hive_partitioning=true)
-    """).fetchall())
+    return list_hive_partitions(bronze_root)
 
 
 def get_processed_partitions(con):
@@ -20,46 +20,53 @@ def get_processed_partitions(con):
     """).fetchall())
 
 
-def process_partition(con, city, date):
-    logger.info(f"Processing Silver partition: {city} - {date}")
+def transform_partitions(con, partitions):
+    register_partitions(con, "silver_to_process", partitions)
 
-    con.execute(f"""
-        CREATE OR REPLACE TABLE tmp_silver AS
+    con.execute("""
+        CREATE OR REPLACE TEMP TABLE tmp_silver AS
         SELECT
             city,
             CAST(date AS DATE) AS date,
-            STRPTIME(time, '%Y-%m-%dT%H:%M') AS timestamp,
-            CAST(temperature_2m AS DOUBLE) AS temperature,
-            CAST(wind_speed_10m AS DOUBLE) AS wind_speed,
-            CAST(wind_direction_10m AS INTEGER) AS wind_direction,
-            CAST(weather_code AS INTEGER) AS weather_code
-        FROM read_parquet('{bronze_path}', hive_partitioning=true)
-        WHERE city = '{city}'
-          AND date = '{date}'
-          AND temperature_2m IS NOT NULL
-    """)
+            time AS timestamp,
+            temperature_2m AS temperature,
+            wind_speed_10m AS wind_speed,
+            wind_direction_10m AS wind_direction,
+            weather_code
+        FROM read_parquet($1, hive_partitioning=true)
+        SEMI JOIN silver_to_process USING (city, date)
+        WHERE temperature_2m IS NOT NULL
+    """, [partition_paths(bronze_root, partitions)])
+
+    empty = con.execute("""
+        SELECT city, date
+        FROM silver_to_process
+        ANTI JOIN tmp_silver USING (city, date)
+    """).fetchall()
 
-    row_count = con.execute(
-        "SELECT COUNT(*) FROM tmp_silver"
-    ).fetchone()[0]
+    if empty:
+        raise ValueError(f"Empty Silver partitions: {empty}")
 
-    if row_count == 0:
-        raise ValueError(f"Empty Silver partition: {city} - {date}")
 
+def write_partitions(con):
     # Write partitioned silver data
     con.execute("""
         COPY tmp_silver
         TO 'silver'
-        (FORMAT PARQUET, PARTITION_BY (city, date), OVERWRITE TRUE);
+        (FORMAT PARQUET, COMPRESSION 'zstd', PARTITION_BY (city, date), OVERWRITE_OR_IGNORE);
     """)
 
+
+def process_partitions(con, partitions):
+    logger.info(f"Processing {len(partitions)} Silver partitions")
+
+    transform_partitions(con, partitions)
+    write_partitions(con)
+
     # Update metadata
-    con.execute("""
-        INSERT OR REPLACE INTO pipeline_metadata
-        VALUES ('silver', ?, ?, CURRENT_TIMESTAMP)
-    """, [city, date])
+    mark_processed(con, {"silver": "silver_to_process"})
 
-    logger.info(f"Finished Silver partition: {city} - {date}")
+    logger.info(f"Finished {len(partitions)} Silver partitions")
 
 
 def run(con):
@@ -70,5 +77,5 @@ def run(con):
 
     logger.info(f"{len(to_process)} partitions to process")
 
-    for city, date in to_process:
-        process_partition(con, city, date)
+    if to_process:
+        process_partitions(con, to_process)